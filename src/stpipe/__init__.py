@@ -5,4 +5,35 @@ from .step import Step
 __version__ = _version.version
 
 
-__all__ = ["Pipeline", "Step", "__version__"]
+def clear_crds_cache():
+    """Discard all cached CRDS reference file lookups and parsed
+    parameter reference files.
+
+    Cached lookups already depend on the CRDS context, use this to
+    force new lookups during an interactive session.
+    """
+    from .config_parser import _load_cached_config_file
+    from .crds_client import clear_cache
+
+    clear_cache()
+    _load_cached_config_file.cache_clear()
+
+
+def clear_step_alias_cache():
+    """Discard the cached index of step class aliases.
+
+    Use this if step entry points were installed or changed after the
+    first class alias lookup.
+    """
+    from .utilities import _get_class_aliases
+
+    _get_class_aliases.cache_clear()
+
+
+__all__ = [
+    "Pipeline",
+    "Step",
+    "__version__",
+    "clear_crds_cache",
+    "clear_step_alias_cache",
+]
@@ -347,13 +347,14 @@ def just_the_step_from_cmdline(args, cls=None):
         step.set_primary_input(positional[0])
         step.save_results = True
 
-    log.log.info(f"Hostname: {os.uname()[1]}")
-    log.log.info(f"OS: {os.uname()[0]}")
+    uname = os.uname()
+    log.log.info("Hostname: %s", uname.nodename)
+    log.log.info("OS: %s", uname.sysname)
 
     # Save the step configuration
     if known.save_parameters:
         step.export_config(known.save_parameters, include_metadata=True)
-        log.log.info(f"Step/Pipeline parameters saved to '{known.save_parameters}'")
+        log.log.info("Step/Pipeline parameters saved to '%s'", known.save_parameters)
 
     return step, step_class, positional, debug_on_exception
 
@@ -2,6 +2,8 @@
 Our configuration files are ConfigObj/INI files.
 """
 
+import copy
+import functools
 import logging
 import os
 import os.path
@@ -101,6 +103,22 @@ def _is_string_or_datamodel(value):
     raise VdtTypeError(value)
 
 
+@functools.lru_cache(maxsize=32)
+def _get_validator(root_dir):
+    """
+    Return a Validator with the stpipe specific checks for ``root_dir``.
+
+    Validators are reused so that the checks parsed from the spec
+    (which the Validator caches) are shared between validations.
+    """
+    validator = Validator()
+    validator.functions["input_file"] = _get_input_file_check(root_dir)
+    validator.functions["output_file"] = _get_output_file_check(root_dir)
+    validator.functions["is_datamodel"] = _is_datamodel
+    validator.functions["is_string_or_datamodel"] = _is_string_or_datamodel
+    return validator
+
+
 def load_config_file(config_file):
     """
     Read the file `config_file` and return the parsed configuration.
@@ -117,6 +135,22 @@ def load_config_file(config_file):
         return ConfigObj(config_file, raise_errors=True)
 
 
+@functools.lru_cache(maxsize=64)
+def _load_cached_config_file(config_file):
+    return load_config_file(config_file)
+
+
+def load_reference_config_file(config_file):
+    """
+    Read the reference file `config_file` and return the parsed configuration.
+
+    Unlike `load_config_file` the parsed configuration is cached, so
+    this should only be used for files that do not change (like CRDS
+    parameter reference files). A copy is returned, so it can be modified.
+    """
+    return copy.deepcopy(_load_cached_config_file(config_file))
+
+
 def _config_obj_from_asdf(asdf_file):
     config = StepConfig.from_asdf(asdf_file)
     return _config_obj_from_step_config(config)
@@ -328,11 +362,7 @@ def validate(
         return config
 
     if validator is None:
-        validator = Validator()
-        validator.functions["input_file"] = _get_input_file_check(root_dir)
-        validator.functions["output_file"] = _get_output_file_check(root_dir)
-        validator.functions["is_datamodel"] = _is_datamodel
-        validator.functions["is_string_or_datamodel"] = _is_string_or_datamodel
+        validator = _get_validator(root_dir)
 
     orig_configspec = config.main.configspec
     config.main.configspec = spec
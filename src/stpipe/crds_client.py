@@ -8,7 +8,9 @@ directly in modules other than this crds_client so that dependency order and
 general integration can be managed here.
 """
 
+import functools
 import re
+import threading
 
 import crds
 from crds.core import config, crds_cache_locking, heavy_client, log
@@ -16,7 +18,10 @@ from crds.core.exceptions import CrdsError
 
 __all__ = [
     "check_reference_open",
+    "clear_cache",
     "CrdsError",
+    "get_cached_reference_file",
+    "get_cached_reference_files",
     "get_multiple_reference_paths",
     "get_override_name",
     "get_reference_file",
@@ -115,6 +120,135 @@ def get_reference_file(parameters, reference_file_type, observatory):
     ]
 
 
+# Results of get_cached_reference_file(s), keyed by (frozen parameters,
+# observatory, CRDS context, reference file type)
+_reference_file_cache = {}
+_reference_file_cache_lock = threading.Lock()
+_MAX_CACHED_REFERENCE_FILES = 128
+
+
+def _freeze_parameters(parameters):
+    """Return a hashable version of ``parameters`` or None if that
+    is not possible."""
+    try:
+        frozen_parameters = frozenset(parameters.items())
+        hash(frozen_parameters)
+    except (AttributeError, TypeError):
+        # not a dict or contains unhashable values
+        return None
+    return frozen_parameters
+
+
+def get_cached_reference_files(parameters, reference_file_types, observatory):
+    """
+    Memoized version of `get_multiple_reference_paths`.
+
+    Only the reference file types that are not already cached are
+    requested from CRDS, in a single call. Results are keyed on all
+    of ``parameters`` (not only those CRDS uses for matching) so datasets
+    with different metadata do not share results even if CRDS would
+    select the same reference files. Results are also keyed on the
+    CRDS context so a change of context is not served stale results.
+    Use `clear_cache` to discard cached results.
+
+    Parameters
+    ----------
+    parameters : dict
+        Parameters used by CRDS to compute best references.  Can
+        be obtained from DataModel.get_crds_parameters().
+
+    reference_file_types : list of str
+        List of reference file types.
+
+    observatory: string
+        telescope name used with CRDS,  e.g. 'jwst', 'roman'.
+
+    Returns
+    -------
+    dict
+        Map of reference file type to path (or N/A)
+    """
+    frozen_parameters = _freeze_parameters(parameters)
+    context = None
+    if frozen_parameters is not None:
+        try:
+            context = get_context_used(observatory)
+        except CrdsError:
+            # the context is unknown, don't cache
+            pass
+    if context is None:
+        return get_multiple_reference_paths(
+            parameters, reference_file_types, observatory
+        )
+
+    refpaths = {}
+    missing = []
+    with _reference_file_cache_lock:
+        for reftype in reference_file_types:
+            key = (frozen_parameters, observatory, context, reftype)
+            if key in _reference_file_cache:
+                refpaths[reftype] = _reference_file_cache[key]
+            elif reftype not in missing:
+                missing.append(reftype)
+
+    if missing:
+        fetched = get_multiple_reference_paths(parameters, missing, observatory)
+        with _reference_file_cache_lock:
+            for reftype, refpath in fetched.items():
+                key = (frozen_parameters, observatory, context, reftype)
+                _reference_file_cache[key] = refpath
+            # discard the oldest entries to bound the cache size
+            while len(_reference_file_cache) > _MAX_CACHED_REFERENCE_FILES:
+                del _reference_file_cache[next(iter(_reference_file_cache))]
+        refpaths.update(fetched)
+
+    return {
+        reftype: refpaths[reftype]
+        for reftype in reference_file_types
+        if reftype in refpaths
+    }
+
+
+def get_cached_reference_file(parameters, reference_file_type, observatory):
+    """
+    Memoized version of `get_reference_file`.
+
+    Results are cached on the parameters, reference file type,
+    observatory and CRDS context so that repeated lookups (for example
+    of the parameter reference files for every step in a pipeline) only
+    query CRDS once. Use `clear_cache` to discard cached results.
+
+    Parameters
+    ----------
+    parameters : dict
+        Parameters used by CRDS to compute best references.  Can
+        be obtained from DataModel.get_crds_parameters().
+
+    reference_file_type : string
+        The type of reference file to retrieve.
+
+    observatory: string
+        telescope name used with CRDS,  e.g. 'jwst', 'roman'.
+
+    Returns
+    -------
+    reference_filepath : string
+        The path of the reference in the CRDS file cache, or N/A
+        if CRDS did not return one.
+    """
+    refpaths = get_cached_reference_files(
+        parameters, [reference_file_type], observatory
+    )
+    return refpaths.get(reference_file_type, "N/A")
+
+
+def clear_cache():
+    """Discard all results cached by `get_cached_reference_files`."""
+    with _reference_file_cache_lock:
+        _reference_file_cache.clear()
+
+
+@functools.cache
 def get_override_name(reference_file_type):
     """
     Returns the name of the override configuration parameter for the
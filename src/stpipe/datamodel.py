@@ -20,15 +20,14 @@ class AbstractDataModel(abc.ABC):
         """
         Pseudo subclass check based on these attributes and methods
         """
-        if cls is AbstractDataModel:
-            mro = c_.__mro__
-            if (
-                any(hasattr(CC, "crds_observatory") for CC in mro)
-                and any(hasattr(CC, "get_crds_parameters") for CC in mro)
-                and any(hasattr(CC, "save") for CC in mro)
-            ):
-                return True
-        return False
+        # hasattr searches the mro of c_ and ABCMeta caches the
+        # result per class, so isinstance checks stay cheap
+        return (
+            cls is AbstractDataModel
+            and hasattr(c_, "crds_observatory")
+            and hasattr(c_, "get_crds_parameters")
+            and hasattr(c_, "save")
+        )
 
     @property
     @abc.abstractmethod
@@ -8,8 +8,6 @@ from collections.abc import Iterable, MutableMapping
 from pathlib import Path
 from types import MappingProxyType
 
-import asdf
-
 from .datamodel import AbstractDataModel
 
 __all__ = [
@@ -82,13 +80,11 @@ class _Ledger(MutableMapping):
 
     def __delitem__(self, model_or_index):
         if isinstance(model_or_index, int):
-            index = model_or_index
-            model = self._index_to_model[index]
+            model = self._index_to_model.pop(model_or_index)
+            del self._id_to_index[id(model)]
         else:
-            model = model_or_index
-            index = self._id_to_index[id(model)]
-        del self._id_to_index[id(model)]
-        del self._index_to_model[index]
+            index = self._id_to_index.pop(id(model_or_index))
+            del self._index_to_model[index]
 
     def __iter__(self):
         # only return indexes
@@ -217,8 +213,9 @@ class AbstractModelLibrary(abc.ABC):
 
             # make a fake asn from the models
             members = []
-            for index, model_or_filename in enumerate(init):
-                if asn_n_members is not None and len(members) == asn_n_members:
+            n_members = 0
+            for model_or_filename in init:
+                if asn_n_members is not None and n_members == asn_n_members:
                     break
                 if isinstance(model_or_filename, (str, Path)):
                     # Supporting a list of filenames by opening them as models
@@ -240,11 +237,12 @@ class AbstractModelLibrary(abc.ABC):
                     {
                         "expname": self._model_to_filename(model),
                         "exptype": exptype,
-                        "group_id": self._to_group_id(model, len(members)),
+                        "group_id": self._to_group_id(model, n_members),
                     }
                 )
 
-                self._loaded_models[len(self._loaded_models)] = model
+                self._loaded_models[n_members] = model
+                n_members += 1
 
             # since we've already filtered by asn type and n members reset these values
             asn_exptypes = None
@@ -278,9 +276,10 @@ class AbstractModelLibrary(abc.ABC):
         self._members = self._asn["products"][0]["members"]
 
         for index, member in enumerate(self._members):
-            if "group_id" not in member:
-                filename = os.path.join(self._asn_dir, member["expname"])
-                member["group_id"] = self._to_group_id(filename, index)
+            if "group_id" in member:
+                continue
+            filename = os.path.join(self._asn_dir, member["expname"])
+            member["group_id"] = self._to_group_id(filename, index)
 
         if not on_disk:
             # if models were provided as input, assign the members here
@@ -311,12 +310,14 @@ class AbstractModelLibrary(abc.ABC):
         # return a "read only" association
         def _to_read_only(obj):
             if isinstance(obj, dict):
-                return MappingProxyType(obj)
+                return MappingProxyType(
+                    {key: _to_read_only(value) for key, value in obj.items()}
+                )
             if isinstance(obj, list):
-                return tuple(obj)
+                return tuple(_to_read_only(item) for item in obj)
             return obj
 
-        return asdf.treeutil.walk_and_modify(self._asn, _to_read_only)
+        return _to_read_only(self._asn)
 
     @property
     def group_names(self):
@@ -345,10 +346,7 @@ class AbstractModelLibrary(abc.ABC):
         """
         group_dict = {}
         for i, member in enumerate(self._members):
-            group_id = member["group_id"]
-            if group_id not in group_dict:
-                group_dict[group_id] = []
-            group_dict[group_id].append(i)
+            group_dict.setdefault(member["group_id"], []).append(i)
         return group_dict
 
     def __len__(self):
@@ -477,13 +475,15 @@ class AbstractModelLibrary(abc.ABC):
                 # if we have an old model for this index that was saved
                 # in the temporary directory and this model has a different
                 # filename, remove the old file.
-                if index in self._temp_filenames:
-                    old_filename = self._temp_filenames[index]
-                    if old_filename != temp_filename:
+                old_filename = self._temp_filenames.get(index)
+                if old_filename is not None and old_filename != temp_filename:
+                    try:
                         os.remove(old_filename)
+                    except FileNotFoundError:
+                        pass
 
                 self._temp_filenames[index] = temp_filename
-            else:
+            elif self._loaded_models.get(index) is not model:
                 self._loaded_models[index] = model
 
         del self._ledger[index]
@@ -500,8 +500,9 @@ class AbstractModelLibrary(abc.ABC):
             the models produced by this generator will result in a
             `BorrowError`.
         """
+        borrow = self.borrow
         for i in range(len(self)):
-            yield self.borrow(i)
+            yield borrow(i)
 
     def _assign_member_to_model(self, model, member):
         """
@@ -605,8 +606,10 @@ class AbstractModelLibrary(abc.ABC):
         if not path.exists():
             path.mkdir()
         members = []
+        borrow, shelve = self.borrow, self.shelve
         with self:
-            for i, model in enumerate(self):
+            for i in range(len(self)):
+                model = borrow(i)
                 mfn = Path(self._model_to_filename(model))
                 model.save(path / mfn, **kwargs)
                 members.append(
@@ -616,7 +619,7 @@ class AbstractModelLibrary(abc.ABC):
                         "group_id": self._model_to_group_id(model),
                     }
                 )
-                self.shelve(model, i, modify=False)
+                shelve(model, i, modify=False)
         asn_data = {"products": [{"members": members}]}
         asn_path = path / "asn.json"
         with open(asn_path, "w") as f:
@@ -671,10 +674,12 @@ class AbstractModelLibrary(abc.ABC):
             List of reference files used during the execution of this
             step.
         """
+        borrow, shelve = self.borrow, self.shelve
         with self:
-            for i, model in enumerate(self):
+            for i in range(len(self)):
+                model = borrow(i)
                 step.finalize_result(model, reference_files_used)
-                self.shelve(model, i)
+                shelve(model, i)
 
     def __enter__(self):
         """
@@ -735,14 +740,16 @@ class AbstractModelLibrary(abc.ABC):
             of all the function calls (ordered the same as the models in
             the library).
         """
+        borrow, shelve = self.borrow, self.shelve
         with self:
-            for index, model in enumerate(self):
+            for index in range(len(self)):
+                model = borrow(index)
                 try:
                     yield function(model, index)
                 finally:
                     # this is in a finally to allow cleanup if the generator is
                     # deleted after it finishes (when it's not fully consumed)
-                    self.shelve(model, index, modify)
+                    shelve(model, index, modify)
                 # remove the local reference to model here to allow it
                 # to be garbage collected before the next model is generated
                 del model
@@ -3,10 +3,11 @@ Logging setup etc.
 """
 
 import fnmatch
+import functools
 import io
 import logging
-import os
 import pathlib
+import re
 import sys
 import threading
 from contextlib import contextmanager
@@ -17,6 +18,9 @@ from astropy.extern.configobj.configobj import ConfigObj
 from . import config_parser
 
 STPIPE_ROOT_LOGGER = "stpipe"
+_STPIPE_ROOT_LOGGER_LEN = len(STPIPE_ROOT_LOGGER)
+_STPIPE_PREFIX = STPIPE_ROOT_LOGGER + "."
+_STPIPE_PREFIX_LEN = len(_STPIPE_PREFIX)
 DEFAULT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 DEFAULT_CONFIGURATION = b"""
 [*]
@@ -63,8 +67,31 @@ class BreakHandler(logging.Handler):
 #########################################################################
 # LOGGING CONFIGURATION
 
-# A dictionary mapping patterns to
-log_config = {}
+# The LogConfig instances from the most recently loaded configuration
+# (in the order they appear in the configuration file)
+log_config = []
+
+# Handler factories keyed by the handler string prefix (including the
+# ":" separator for handlers that take a filename)
+_HANDLER_FACTORIES = {
+    "file:": lambda filename: logging.FileHandler(filename, "w", "utf-8", True),
+    "append:": lambda filename: logging.FileHandler(filename, "a", "utf-8", True),
+    "stdout": lambda _: logging.StreamHandler(sys.stdout),
+    "stderr": lambda _: logging.StreamHandler(sys.stderr),
+}
+
+
+def _get_handler_factory(handler_str):
+    """
+    Given a handler string, returns a callable that creates the
+    corresponding `logging.Handler`.
+    """
+    prefix, sep, arg = handler_str.partition(":")
+    try:
+        factory = _HANDLER_FACTORIES[prefix + sep]
+    except KeyError:
+        raise ValueError(f"Can't parse handler {handler_str!r}") from None
+    return functools.partial(factory, arg)
 
 
 class LogConfig:
@@ -91,46 +118,46 @@ class LogConfig:
         if name in ("", ".", "root"):
             name = "*"
         self.name = name
-        self.handler = handler
-        if not isinstance(self.handler, list):
-            if self.handler.strip() == "":
-                self.handler = []
+        self._match_all = name == "*"
+        self._regex = re.compile(fnmatch.translate(name))
+        if handler is None:
+            handler = ()
+        elif isinstance(handler, str):
+            if handler.strip() == "":
+                handler = ()
             else:
-                self.handler = [x.strip() for x in self.handler.split(",")]
+                handler = [x.strip() for x in handler.split(",")]
+        self.handler = tuple(handler)
+        # resolve the handler factories now so invalid handlers are
+        # reported when the configuration is loaded
+        self._handler_factories = tuple(
+            _get_handler_factory(handler_str) for handler_str in self.handler
+        )
         self.level = level
         self.break_level = break_level
         if format is None:
             format = DEFAULT_FORMAT  # noqa: A001
         self.format = format
+        self._formatter = logging.Formatter(format)
 
     def match(self, log_name):
         """
         Returns `True` if `log_name` matches the pattern of this
         configuration.
         """
-        if log_name.startswith(STPIPE_ROOT_LOGGER):
-            log_name = log_name[len(STPIPE_ROOT_LOGGER) + 1 :]
-            if fnmatch.fnmatchcase(log_name, self.name):
+        if log_name.startswith(_STPIPE_PREFIX):
+            if self._match_all:
                 return True
+            return self._regex.match(log_name[_STPIPE_PREFIX_LEN:]) is not None
+        if log_name == STPIPE_ROOT_LOGGER:
+            return self._match_all or self._regex.match("") is not None
         return False
 
     def get_handler(self, handler_str):
         """
         Given a handler string, returns a `logging.Handler` object.
         """
-        if handler_str.startswith("file:"):
-            return logging.FileHandler(handler_str[5:], "w", "utf-8", True)
-
-        if handler_str.startswith("append:"):
-            return logging.FileHandler(handler_str[7:], "a", "utf-8", True)
-
-        if handler_str == "stdout":
-            return logging.StreamHandler(sys.stdout)
-
-        if handler_str == "stderr":
-            return logging.StreamHandler(sys.stderr)
-
-        raise ValueError(f"Can't parse handler {handler_str!r}")
+        return _get_handler_factory(handler_str)()
 
     def apply(self, log):
         """
@@ -139,13 +166,15 @@ class LogConfig:
         """
         for handler in log.handlers[:]:
             if hasattr(handler, "_from_config"):
-                log.handlers.remove(handler)
+                log.removeHandler(handler)
+                handler.close()
 
         # Set a handler
-        for handler_str in self.handler:
-            handler = self.get_handler(handler_str)
+        for handler_factory in self._handler_factories:
+            handler = handler_factory()
             handler._from_config = True
             handler.setLevel(self.level)
+            handler.setFormatter(self._formatter)
             log.addHandler(handler)
 
         # Set the log level
@@ -153,14 +182,9 @@ class LogConfig:
 
         # Set the break level
         if self.break_level != logging.NOTSET:
-            log.addHandler(BreakHandler(self.break_level))
-
-        formatter = logging.Formatter(self.format)
-        for handler in log.handlers:
-            if isinstance(handler, logging.Handler) and hasattr(
-                handler, "_from_config"
-            ):
-                handler.setFormatter(formatter)
+            handler = BreakHandler(self.break_level)
+            handler.setFormatter(self._formatter)
+            log.addHandler(handler)
 
     def match_and_apply(self, log):
         """
@@ -171,28 +195,88 @@ class LogConfig:
             self.apply(log)
 
 
-def load_configuration(config_file):
+class _PatternTrie:
     """
-    Loads a logging configuration file.  The format of this file is
-    defined in LogConfig.spec.
+    Index `LogConfig` instances by the literal (wildcard free) dotted
+    components at the start of their patterns.
 
-    Parameters
-    ----------
-    config_file : str, pathlib.Path instance or readable file-like object
+    Looking up a logger name only tests the configurations stored along
+    its dotted path (with `LogConfig.match`), instead of testing every
+    configuration against every logger.
     """
 
-    def _level_check(value):
-        try:
-            value = int(value)
-        except ValueError:
-            pass
+    _WILDCARDS = frozenset("*?[")
 
-        try:
-            value = logging._checkLevel(value)
-        except ValueError as err:
-            raise validate.VdtTypeError(value) from err
-        return value
+    def __init__(self):
+        self._root = ({}, [])
+        self._count = 0
+
+    def insert(self, config):
+        """
+        Add a `LogConfig` to the trie.
+        """
+        children, entries = self._root
+        for part in config.name.split("."):
+            if not self._WILDCARDS.isdisjoint(part):
+                break
+            children, entries = children.setdefault(part, ({}, []))
+        entries.append((self._count, config))
+        self._count += 1
+
+    def matches(self, log_name):
+        """
+        Return the configurations matching ``log_name`` in the order
+        they were inserted.
+        """
+        if log_name.startswith(_STPIPE_PREFIX):
+            parts = log_name[_STPIPE_PREFIX_LEN:].split(".")
+        elif log_name == STPIPE_ROOT_LOGGER:
+            parts = [""]
+        else:
+            return []
+
+        found = []
+        children, entries = self._root
+        for i in range(len(parts) + 1):
+            found.extend(
+                (order, config) for order, config in entries if config.match(log_name)
+            )
+            if i == len(parts) or parts[i] not in children:
+                break
+            children, entries = children[parts[i]]
+        found.sort(key=lambda item: item[0])
+        return [config for _, config in found]
 
+    def match_and_apply(self, log):
+        """
+        Apply the configuration matching the given `logging.Logger`.
+
+        `LogConfig.apply` replaces everything set by a previously applied
+        configuration so only the last match needs to be applied.
+        """
+        configs = self.matches(log.name)
+        if configs:
+            configs[-1].apply(log)
+
+
+def _level_check(value):
+    try:
+        value = int(value)
+    except ValueError:
+        pass
+
+    try:
+        value = logging._checkLevel(value)
+    except ValueError as err:
+        raise validate.VdtTypeError(value) from err
+    return value
+
+
+def _parse_configuration(config_file):
+    """
+    Parse and validate a logging configuration file returning
+    a tuple of (pattern, values) pairs.
+    """
     spec = config_parser.load_spec_file(LogConfig)
     if isinstance(config_file, pathlib.Path):
         config_file = str(config_file)
@@ -200,16 +284,51 @@ def load_configuration(config_file):
     val = validate.Validator()
     val.functions["level"] = _level_check
     config_parser.validate(config, spec, validator=val)
+    return tuple((key, dict(values)) for key, values in config.items())
+
+
+@functools.lru_cache
+def _parse_builtin_configuration(content):
+    """
+    Cached `_parse_configuration` for the built-in configurations.
+    """
+    return _parse_configuration(io.BytesIO(content))
+
+
+def load_configuration(config_file):
+    """
+    Loads a logging configuration file.  The format of this file is
+    defined in LogConfig.spec.
+
+    Parameters
+    ----------
+    config_file : str, pathlib.Path instance or readable file-like object
+    """
+    if isinstance(config_file, io.BytesIO) and config_file.getvalue() in (
+        DEFAULT_CONFIGURATION,
+        MAX_CONFIGURATION,
+    ):
+        items = _parse_builtin_configuration(config_file.getvalue())
+    else:
+        items = _parse_configuration(config_file)
 
     log_config.clear()
 
-    for key, val in config.items():
-        log_config[key] = LogConfig(key, **val)
+    trie = _PatternTrie()
+    for key, val in items:
+        cfg = LogConfig(key, **val)
+        log_config.append(cfg)
+        trie.insert(cfg)
 
-    for log in logging.Logger.manager.loggerDict.values():
-        if isinstance(log, logging.Logger):
-            for cfg in log_config.values():
-                cfg.match_and_apply(log)
+    # only loggers in the stpipe hierarchy can match a configuration
+    stpipe_loggers = [
+        log
+        for log in logging.Logger.manager.loggerDict.values()
+        if isinstance(log, logging.Logger)
+        and (log.name == STPIPE_ROOT_LOGGER or log.name.startswith(_STPIPE_PREFIX))
+    ]
+    for log in stpipe_loggers:
+        trie.match_and_apply(log)
 
 
 def getLogger(name=None):  # noqa: N802
@@ -220,9 +339,12 @@ def _find_logging_config_file():
     files = ["stpipe-log.cfg", "~/.stpipe-log.cfg", "/etc/stpipe-log.cfg"]
 
     for file in files:
-        file = os.path.expanduser(file)
-        if os.path.exists(file):
-            return os.path.abspath(file)
+        path = pathlib.Path(file).expanduser()
+        try:
+            if path.is_file():
+                return str(path.absolute())
+        except OSError:
+            continue
 
     return io.BytesIO(DEFAULT_CONFIGURATION)
 
@@ -238,23 +360,34 @@ class DelegationHandler(logging.Handler):
     of the `stpipe` hierarchy, in order to prevent infinite recursion.
 
     Since we could be multi-threaded and each thread may be running a
-    different thread, we need to manage a dictionary mapping the
-    current thread to the Step's logger on that thread.
+    different thread, we need to keep track of the Step's logger on
+    each thread (using thread-local storage).
     """
 
     def __init__(self, *args, **kwargs):
-        self._logs = {}
+        self._local = threading.local()
         logging.Handler.__init__(self, *args, **kwargs)
 
+    def handle(self, record):
+        # skip records the delegated logger would not log before doing
+        # any of the (locked) handler work
+        log = getattr(self._local, "log", None)
+        if log is None or not log.isEnabledFor(record.levelno):
+            return False
+        return super().handle(record)
+
     def emit(self, record):
-        log = self.log
-        if log is not None and not record.name.startswith(STPIPE_ROOT_LOGGER):
+        log = getattr(self._local, "log", None)
+        if (
+            log is not None
+            and record.name[:_STPIPE_ROOT_LOGGER_LEN] != STPIPE_ROOT_LOGGER
+        ):
             record.name = log.name
             log.handle(record)
 
     @property
     def log(self):
-        return self._logs.get(threading.current_thread(), None)
+        return getattr(self._local, "log", None)
 
     @log.setter
     def log(self, log):
@@ -263,7 +396,7 @@ class DelegationHandler(logging.Handler):
         ):
             raise AssertionError("Can't set the log to a root logger")
 
-        self._logs[threading.current_thread()] = log
+        self._local.log = log
 
 
 class RecordingHandler(logging.Handler):
@@ -292,11 +425,19 @@ def record_logs(level=logging.NOTSET, formatter=None):
         handler = RecordingHandler(level=level)
         handler.setFormatter(formatter)
         logger = getLogger(STPIPE_ROOT_LOGGER)
+        # if a level was requested that the logger would discard, temporarily
+        # lower the logger level so these records are recorded
+        previous_level = logger.level
+        lower_level = level != logging.NOTSET and level < logger.getEffectiveLevel()
+        if lower_level:
+            logger.setLevel(level)
         logger.addHandler(handler)
         try:
             yield handler.log_records
         finally:
             logger.removeHandler(handler)
+            if lower_level:
+                logger.setLevel(previous_level)
 
 
 # Install the delegation handler on the root logger.  The Step class
@@ -311,4 +452,5 @@ logging_config_file = _find_logging_config_file()
 if logging_config_file is not None:
     load_configuration(logging_config_file)
 
-logging.captureWarnings(True)
+if logging._warnings_showwarning is None:
+    logging.captureWarnings(True)
@@ -8,7 +8,7 @@ from typing import ClassVar
 
 from astropy.extern.configobj.configobj import ConfigObj, Section
 
-from . import config_parser, crds_client, log
+from . import config_parser, log
 from .library import AbstractModelLibrary
 from .step import Step, get_disable_crds_steppars
 from .utilities import _not_set
@@ -17,6 +17,13 @@ from .utilities import _not_set
 # delegator, since the pipeline has not yet been instantiated.
 logger = log.delegator.log
 
+# Spec entries added to every step section of a Pipeline spec
+_STEP_SECTION_SPEC = {
+    "config_file": "string(default=None)",
+    "name": "string(default='')",
+    "class": "string(default='')",
+}
+
 
 class Pipeline(Step):
     """
@@ -62,11 +69,14 @@ class Pipeline(Step):
         Overridden reftypes are included but handled normally later by the
         Pipeline version of the get_ref_override() method defined below.
         """
-        return [
-            reftype
-            for step in self._unskipped_steps
-            for reftype in step.reference_file_types
-        ]
+        # unique reftypes, in step order
+        return list(
+            dict.fromkeys(
+                reftype
+                for step in self._unskipped_steps
+                for reftype in step.reference_file_types
+            )
+        )
 
     @property
     def _unskipped_steps(self):
@@ -74,13 +84,8 @@ class Pipeline(Step):
 
         Steps are also excluded if `Step.prefetch_references` is False.
         """
-        return [
-            getattr(self, name)
-            for name in self.step_defs
-            if (
-                not getattr(self, name).skip and getattr(self, name).prefetch_references
-            )
-        ]
+        steps = (getattr(self, name) for name in self.step_defs)
+        return [step for step in steps if not step.skip and step.prefetch_references]
 
     def get_ref_override(self, reference_file_type):
         """Return any override for ``reference_file_type`` for any of the steps in
@@ -100,16 +105,22 @@ class Pipeline(Step):
     @classmethod
     def merge_config(cls, config, config_file):
         steps = config.get("steps", {})
+        if not steps:
+            # nothing to merge (the common case)
+            return config
 
         # Configure all of the steps
+        config_dir = None
         for key in cls.step_defs:
             cfg = steps.get(key)
             if cfg is not None:
                 # If a config_file is specified, load those values and
                 # then override them with our values.
                 if cfg.get("config_file"):
+                    if config_dir is None:
+                        config_dir = dirname(config_file or "")
                     cfg2 = config_parser.load_config_file(
-                        join(dirname(config_file or ""), cfg.get("config_file"))
+                        join(config_dir, cfg.get("config_file"))
                     )
                     del cfg["config_file"]
                     config_parser.merge_config(cfg2, cfg)
@@ -117,27 +128,44 @@ class Pipeline(Step):
         return config
 
     @classmethod
-    def load_spec_file(cls, preserve_comments=_not_set):
+    def _spec_cache_key(cls):
+        # the spec includes the specs of all steps so it has to be
+        # reloaded if step_defs (here or in a nested pipeline) change
+        return tuple(
+            (
+                key,
+                val,
+                val._spec_cache_key()
+                if isinstance(val, type) and issubclass(val, Step)
+                else None,
+            )
+            for key, val in cls.step_defs.items()
+        )
+
+    @classmethod
+    def _load_spec_file(cls, preserve_comments=_not_set):
         spec = config_parser.get_merged_spec_file(
             cls, preserve_comments=preserve_comments
         )
 
         spec["steps"] = Section(spec, spec.depth + 1, spec.main, name="steps")
         steps = spec["steps"]
+        # the same Step class may be used for several steps, only load
+        # (and merge) its spec once, it is not modified below
+        stepspecs = {}
         for key, val in cls.step_defs.items():
             if not issubclass(val, Step):
                 raise TypeError(f"Entry {key!r} in step_defs is not a Step subclass")
-            stepspec = val.load_spec_file(preserve_comments=preserve_comments)
+            if val not in stepspecs:
+                stepspecs[val] = val.load_spec_file(preserve_comments=preserve_comments)
+            stepspec = stepspecs[val]
             steps[key] = Section(steps, steps.depth + 1, steps.main, name=key)
 
             config_parser.merge_config(steps[key], stepspec)
 
             # Also add a key that can be used to specify an external
             # config_file
-            step = spec["steps"][key]
-            step["config_file"] = "string(default=None)"
-            step["name"] = "string(default='')"
-            step["class"] = "string(default='')"
+            steps[key].update(_STEP_SECTION_SPEC)
 
         return spec
 
@@ -192,17 +220,20 @@ class Pipeline(Step):
                 crds_parameters = model.get_crds_parameters()
                 crds_observatory = model.crds_observatory
 
-        for cal_step in cls.step_defs.keys():
-            cal_step_class = cls.step_defs[cal_step]
+        from . import crds_client
+
+        for cal_step, cal_step_class in cls.step_defs.items():
+            # retrieval was already checked above, don't re-check per step
             refcfg["steps"][cal_step] = cal_step_class.get_config_from_reference(
                 crds_parameters,
+                disable=False,
                 crds_observatory=crds_observatory,
             )
         #
         # Now merge any config parameters from the step cfg file
         logger.debug("Retrieving pipeline %s parameters from CRDS", reftype.upper())
         try:
-            ref_file = crds_client.get_reference_file(
+            ref_file = crds_client.get_cached_reference_file(
                 crds_parameters,
                 reftype,
                 crds_observatory,
@@ -242,7 +273,7 @@ class Pipeline(Step):
         precedence over those from the individual steps
         """
 
-        pipeline_cfg = config_parser.load_config_file(ref_file)
+        pipeline_cfg = config_parser.load_reference_config_file(ref_file)
         config_parser.merge_config(refcfg, pipeline_cfg)
         return refcfg
 
@@ -303,24 +334,28 @@ class Pipeline(Step):
             Only a `DataModel` instance is allowed.
             Cannot be a filename, Sequence, etc.
         """
-        ovr_refs = {
-            reftype: self.get_ref_override(reftype)
-            for reftype in self.reference_file_types
-            if self.get_ref_override(reftype) is not None
-        }
+        from . import crds_client
+
+        reftypes = self.reference_file_types
+        # the first step with an override for a reftype takes precedence
+        ovr_refs = {}
+        for step in self._unskipped_steps:
+            for reftype, override in step._get_ref_overrides().items():
+                ovr_refs.setdefault(reftype, override)
 
-        fetch_types = sorted(set(self.reference_file_types) - set(ovr_refs.keys()))
+        fetch_types = sorted(set(reftypes).difference(ovr_refs))
 
         self.log.info(
             "Prefetching reference files for dataset: %r reftypes = %r",
             model.meta.filename,
             fetch_types,
         )
-        crds_refs = crds_client.get_multiple_reference_paths(
+        # members of an association often share the same parameters
+        crds_refs = crds_client.get_cached_reference_files(
             model.get_crds_parameters(), fetch_types, model.crds_observatory
         )
 
-        ref_path_map = dict(list(crds_refs.items()) + list(ovr_refs.items()))
+        ref_path_map = {**crds_refs, **ovr_refs}
 
         for reftype, refpath in sorted(ref_path_map.items()):
             how = "Override" if reftype in ovr_refs else "Prefetch"
@@ -348,9 +383,11 @@ class Pipeline(Step):
             Keys are the parameters and values are the values.
         """
         pars = super().get_pars(full_spec=full_spec)
-        pars["steps"] = {}
-        for step_name in self.step_defs.keys():
-            pars["steps"][step_name] = getattr(self, step_name).get_pars(
-                full_spec=full_spec
-            )
+        pars["steps"] = {
+            step_name: getattr(self, step_name).get_pars(full_spec=full_spec)
+            for step_name in self.step_defs
+        }
         return pars
+
+    def _get_par_names(self):
+        return super()._get_par_names() | {"steps"}
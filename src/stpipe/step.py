@@ -2,10 +2,13 @@
 Step
 """
 
+import copy
 import gc
+import inspect
 import os
 import sys
 import warnings
+import weakref
 from collections.abc import Sequence
 from contextlib import contextmanager, suppress
 from functools import partial
@@ -25,19 +28,60 @@ from typing import ClassVar
 
 import yaml
 
-try:
-    from astropy.io import fits
-
-    DISCOURAGED_TYPES = (fits.HDUList,)
-except ImportError:
-    DISCOURAGED_TYPES = None
-
-from . import config, config_parser, crds_client, log, utilities
+from . import config, config_parser, log, utilities
 from .datamodel import AbstractDataModel
 from .format_template import FormatTemplate
 from .library import AbstractModelLibrary
 from .utilities import _not_set
 
+# Loaded specs, see `Step.load_spec_file`
+_SPEC_CACHE = weakref.WeakKeyDictionary()
+
+# Specs used by `Step.get_pars`, keyed by class then ``full_spec``
+_PARS_SPEC_CACHE = weakref.WeakKeyDictionary()
+
+# Signatures of `Step.process` (or None if not available) keyed by
+# class, see `Step._check_process_args`
+_PROCESS_SIGNATURE_CACHE = weakref.WeakKeyDictionary()
+
+# Types that should not be passed to or returned from steps, see
+# `_get_discouraged_types`
+_DISCOURAGED_TYPES = _not_set
+
+
+# Config keys that describe a step rather than set its parameters
+_META_KEYS = ("name", "class", "config_file")
+
+
+def _strip_meta_keys(config):
+    """Remove the keys in `_META_KEYS` from ``config``."""
+    for key in _META_KEYS:
+        config.pop(key, None)
+
+
+def _get_discouraged_types():
+    """Return the discouraged types (or None if unavailable).
+
+    astropy.io.fits is only imported on first use since importing
+    it is slow and not needed for most uses of stpipe.
+    """
+    global _DISCOURAGED_TYPES
+    if _DISCOURAGED_TYPES is _not_set:
+        try:
+            from astropy.io import fits
+
+            _DISCOURAGED_TYPES = (fits.HDUList,)
+        except ImportError:
+            _DISCOURAGED_TYPES = None
+    return _DISCOURAGED_TYPES
+
+
+def __getattr__(name):
+    # DISCOURAGED_TYPES is computed on first access
+    if name == "DISCOURAGED_TYPES":
+        return _get_discouraged_types()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 class Step:
     """
@@ -97,9 +141,40 @@ class Step:
 
     @classmethod
     def load_spec_file(cls, preserve_comments=_not_set):
+        """
+        Load the (merged) spec for this class.
+
+        The spec is only loaded once per class (and, for pipelines,
+        ``step_defs``), each call returns a copy that is safe to modify.
+        The spec (and ``reference_file_types``) of a class should not
+        be modified after it is first used.
+        """
+        if preserve_comments is not _not_set:
+            # deprecated, don't cache
+            return cls._load_spec_file(preserve_comments=preserve_comments)
+        key = cls._spec_cache_key()
+        cached = _SPEC_CACHE.get(cls)
+        if cached is None or cached[0] != key:
+            cached = _SPEC_CACHE[cls] = (key, cls._load_spec_file())
+        return copy.deepcopy(cached[1])
+
+    @classmethod
+    def _spec_cache_key(cls):
+        """
+        Return what, besides the class, the cached spec depends on.
+        """
+        return ()
+
+    @classmethod
+    def _load_spec_file(cls, preserve_comments=_not_set):
         spec = config_parser.get_merged_spec_file(
             cls, preserve_comments=preserve_comments
         )
+        if not cls.reference_file_types:
+            return spec
+
+        from . import crds_client
+
         # Add arguments for all of the expected reference files
         for reference_file_type in cls.reference_file_types:
             override_name = crds_client.get_override_name(reference_file_type)
@@ -220,10 +295,7 @@ class Step:
                 else:
                     name = step_class.__name__
 
-        if "name" in config:
-            del config["name"]
-        if "class" in config:
-            del config["class"]
+        _strip_meta_keys(config)
 
         return step_class, name
 
@@ -269,21 +341,15 @@ class Step:
             else:
                 name = cls.__name__
 
-        if "name" in config:
-            del config["name"]
-        if "class" in config:
-            del config["class"]
-        if "config_file" in config:
-            del config["config_file"]
+        _strip_meta_keys(config)
 
         spec = cls.load_spec_file()
         config = cls.merge_config(config, config_file)
         config_parser.validate(config, spec, root_dir=dirname(config_file or ""))
 
-        if "config_file" in config:
-            del config["config_file"]
-        if "name" in config:
-            del config["name"]
+        # merge_config (which subclasses may override) and the spec
+        # defaults can add these back
+        _strip_meta_keys(config)
 
         # cmdline.FromCommandLine instances should not be passed to
         # steps. Instead, convert them back to strings.
@@ -379,7 +445,7 @@ class Step:
         self.config_file = config_file
 
         # Setup the hooks
-        if len(self.pre_hooks) or len(self.post_hooks):
+        if self.pre_hooks or self.post_hooks:
             from . import hooks
 
             self._pre_hooks = hooks.get_hook_objects(self, "pre", self.pre_hooks)
@@ -388,12 +454,42 @@ class Step:
             self._pre_hooks = []
             self._post_hooks = []
 
+    def _check_process_args(self, args):
+        """Check that ``args`` match the signature of ``process``.
+
+        Checking before the call means that TypeErrors raised within
+        ``process`` are not mistaken for an incorrect number of arguments.
+        """
+        # the signature of the bound method is the same for all instances
+        # of a class unless ``process`` was replaced on the instance
+        cls = type(self)
+        cached = "process" not in self.__dict__
+        if cached and cls in _PROCESS_SIGNATURE_CACHE:
+            signature = _PROCESS_SIGNATURE_CACHE[cls]
+        else:
+            try:
+                signature = inspect.signature(self.process)
+            except (TypeError, ValueError):
+                signature = None
+            if cached:
+                _PROCESS_SIGNATURE_CACHE[cls] = signature
+        if signature is None:
+            # no signature available, leave the check to process
+            return
+        try:
+            signature.bind(*args)
+        except TypeError as e:
+            raise TypeError("Incorrect number of arguments to step") from e
+
     def _check_args(self, args, discouraged_types, msg):
         if discouraged_types is None:
             return
 
         if type(args) not in (list, tuple):
-            args = [args]
+            args = (args,)
+
+        if not any(isinstance(arg, discouraged_types) for arg in args):
+            return
 
         for i, arg in enumerate(args):
             if isinstance(arg, discouraged_types):
@@ -420,7 +516,10 @@ class Step:
         the running of each step.  The real work that is unique to
         each step type is done in the `process` method.
         """
-        gc.collect()
+        # Only collect before top-level runs, a full collection before
+        # each step of a pipeline is costly and rarely frees anything.
+        if self.parent is None:
+            gc.collect()
 
         with log.record_logs(formatter=self._log_records_formatter) as log_records:
             self._log_records = log_records
@@ -433,7 +532,8 @@ class Step:
 
             self.log.info("Step %s running with args %s.", self.name, args)
             # log Step or Pipeline parameters from top level only
-            if self.parent is None:
+            # (and only build them if they will be logged)
+            if self.parent is None and self.log.isEnabledFor(log.logging.INFO):
                 self.log.info(
                     "Step %s parameters are:%s",
                     self.name,
@@ -461,18 +561,19 @@ class Step:
                 if self.suffix is None:
                     self.suffix = self.default_suffix()
 
-                hook_args = args
-                for pre_hook in self._pre_hooks:
-                    hook_results = pre_hook.run(*hook_args)
-                    if hook_results is not None:
-                        hook_args = (hook_results,)
-                args = hook_args
+                if self._pre_hooks:
+                    hook_args = args
+                    for pre_hook in self._pre_hooks:
+                        hook_results = pre_hook.run(*hook_args)
+                        if hook_results is not None:
+                            hook_args = (hook_results,)
+                    args = hook_args
 
                 self._reference_files_used = []
 
                 # Warn if passing in objects that should be
                 # discouraged.
-                self._check_args(args, DISCOURAGED_TYPES, "Passed")
+                self._check_args(args, _get_discouraged_types(), "Passed")
 
                 # Run the Step-specific code.
                 if self.skip:
@@ -487,8 +588,7 @@ class Step:
                                 )
                             except AttributeError as e:
                                 self.log.info(
-                                    "Could not record skip into DataModel "
-                                    "header: %s",
+                                    "Could not record skip into DataModel header: %s",
                                     e,
                                 )
 
@@ -503,17 +603,11 @@ class Step:
                 else:
                     if self.prefetch_references:
                         self.prefetch(*args)
-                    try:
-                        step_result = self.process(*args)
-                    except TypeError as e:
-                        if "process() takes exactly" in str(e):
-                            raise TypeError(
-                                "Incorrect number of arguments to step"
-                            ) from e
-                        raise
+                    self._check_process_args(args)
+                    step_result = self.process(*args)
 
                 # Warn if returning a discouraged object
-                self._check_args(step_result, DISCOURAGED_TYPES, "Returned")
+                self._check_args(step_result, _get_discouraged_types(), "Returned")
 
                 # Run the post hooks
                 for post_hook in self._post_hooks:
@@ -546,17 +640,22 @@ class Step:
                     else:
                         results_to_save = step_result
 
+                    single_result = len(results_to_save) <= 1
+                    # if the output path can't be determined for one result
+                    # it can't be for any, only warn once
+                    no_output_path = False
                     for idx, result in enumerate(results_to_save):
-                        if len(results_to_save) <= 1:
+                        if single_result:
                             idx = None
                         if isinstance(
                             result, (AbstractDataModel | AbstractModelLibrary)
                         ):
                             self.save_model(result, idx=idx)
-                        elif hasattr(result, "save"):
+                        elif hasattr(result, "save") and not no_output_path:
                             try:
                                 output_path = self.make_output_path(idx=idx)
                             except AttributeError:
+                                no_output_path = True
                                 self.log.warning(
                                     "`save_results` has been requested, but cannot"
                                     " determine filename."
@@ -725,24 +824,25 @@ class Step:
         value : obj
             Attribute value or default if not found
         """
+        # walk up the hierarchy instead of recursing through the parents
+        steps = []
+        step = self
+        while step is not None:
+            steps.append(step)
+            step = getattr(step, "parent", None)
+
         if parent_first:
-            try:
-                value = self.parent.search_attr(attribute, parent_first=parent_first)
-            except AttributeError:
-                value = None
-            if value is None:
-                value = getattr(self, attribute, default)
-            return value
-
-        value = getattr(self, attribute, None)
-        if value is None:
-            try:
-                value = self.parent.search_attr(attribute)
-            except AttributeError:
-                pass
-        if value is None:
-            value = default
-        return value
+            for step in reversed(steps[1:]):
+                value = getattr(step, attribute, None)
+                if value is not None:
+                    return value
+            return getattr(self, attribute, default)
+
+        for step in steps:
+            value = getattr(step, attribute, None)
+            if value is not None:
+                return value
+        return default
 
     def _precache_references(self, input_file):
         """Because Step precaching precedes calls to get_reference_file() almost
@@ -760,6 +860,8 @@ class Step:
         -------
         override_filepath or None.
         """
+        from . import crds_client
+
         override_name = crds_client.get_override_name(reference_file_type)
         path = getattr(self, override_name, None)
         if isinstance(path, AbstractDataModel):
@@ -767,6 +869,17 @@ class Step:
 
         return abspath(path) if path and path != "N/A" else path
 
+    def _get_ref_overrides(self):
+        """Return a dict mapping each of this step's reference file types to
+        its override, for reference file types that are overridden.
+        """
+        overrides = {}
+        for reference_file_type in self.reference_file_types:
+            override = self.get_ref_override(reference_file_type)
+            if override is not None:
+                overrides[reference_file_type] = override
+        return overrides
+
     def get_reference_file(self, input_file, reference_file_type):
         """
         Get a reference file from CRDS.
@@ -790,6 +903,8 @@ class Step:
         -------
         reference_file : path of reference file,  a string
         """
+        from . import crds_client
+
         override = self.get_ref_override(reference_file_type)
         if override is not None:
             if isinstance(override, AbstractDataModel):
@@ -849,6 +964,15 @@ class Step:
         logger = log.delegator.log
         reftype = cls.get_config_reftype()
 
+        # Check if retrieval should be attempted before opening the dataset.
+        if disable is None:
+            disable = get_disable_crds_steppars()
+        if disable:
+            logger.info(
+                "%s: CRDS parameter reference retrieval disabled.", reftype.upper()
+            )
+            return config_parser.ConfigObj()
+
         if isinstance(dataset, dict):
             # crds_parameters was passed as input from pipeline.py
             crds_parameters = dataset
@@ -867,21 +991,17 @@ class Step:
                     crds_observatory = model.crds_observatory
             except (OSError, TypeError, ValueError):
                 logger.warning("Input dataset is not an instance of AbstractDataModel.")
-                disable = True
+                logger.info(
+                    "%s: CRDS parameter reference retrieval disabled.", reftype.upper()
+                )
+                return config_parser.ConfigObj()
 
-        # Check if retrieval should be attempted.
-        if disable is None:
-            disable = get_disable_crds_steppars()
-        if disable:
-            logger.info(
-                "%s: CRDS parameter reference retrieval disabled.", reftype.upper()
-            )
-            return config_parser.ConfigObj()
+        from . import crds_client
 
         # Retrieve step parameters from CRDS
         logger.debug("Retrieving step %s parameters from CRDS", reftype.upper())
         try:
-            ref_file = crds_client.get_reference_file(
+            ref_file = crds_client.get_cached_reference_file(
                 crds_parameters,
                 reftype,
                 crds_observatory,
@@ -891,14 +1011,17 @@ class Step:
             return config_parser.ConfigObj()
         if ref_file != "N/A":
             logger.info("%s parameters found: %s", reftype.upper(), ref_file)
-            ref = config_parser.load_config_file(ref_file)
-
-            ref_pars = {
-                par: value for par, value in ref.items() if par not in ["class", "name"]
-            }
-            logger.debug(
-                "%s parameters retrieved from CRDS: %s", reftype.upper(), ref_pars
-            )
+            ref = config_parser.load_reference_config_file(ref_file)
+
+            if logger.isEnabledFor(log.logging.DEBUG):
+                ref_pars = {
+                    par: value
+                    for par, value in ref.items()
+                    if par not in ["class", "name"]
+                }
+                logger.debug(
+                    "%s parameters retrieved from CRDS: %s", reftype.upper(), ref_pars
+                )
 
             return ref
 
@@ -1125,8 +1248,9 @@ class Step:
         )
 
         output_dir = step.search_attr("output_dir", default="")
-        output_dir = expandvars(expanduser(output_dir))
-        return join(output_dir, basename)
+        if not output_dir:
+            return basename
+        return join(expandvars(expanduser(output_dir)), basename)
 
     @classmethod
     def _datamodels_open(cls, init, **kwargs):
@@ -1222,13 +1346,7 @@ class Step:
         dict
             Keys are the parameters and values are the values.
         """
-        from . import cmdline
-
-        if full_spec:
-            spec_file_func = config_parser.get_merged_spec_file
-        else:
-            spec_file_func = config_parser.load_spec_file
-        spec = spec_file_func(self)
+        spec = self._get_pars_spec(full_spec)
         if spec is None:
             return {}
         instance_pars = {}
@@ -1239,13 +1357,35 @@ class Step:
         pars = config_parser.config_from_dict(instance_pars, spec, allow_missing=True)
 
         # Convert the config to a pure dict.
-        pars_dict = {}
-        for key, value in pars.items():
-            if isinstance(value, cmdline.FromCommandLine):
-                pars_dict[key] = str(value)
+        # cmdline imports this module, so import it here
+        from .cmdline import FromCommandLine
+
+        return {
+            key: str(value) if isinstance(value, FromCommandLine) else value
+            for key, value in pars.items()
+        }
+
+    def _get_pars_spec(self, full_spec=True):
+        """Return the spec `get_pars` validates against
+
+        The spec is only read, never modified, so one is shared by all
+        instances of a class.
+        """
+        specs = _PARS_SPEC_CACHE.setdefault(type(self), {})
+        if full_spec not in specs:
+            if full_spec:
+                spec_file_func = config_parser.get_merged_spec_file
             else:
-                pars_dict[key] = value
-        return pars_dict
+                spec_file_func = config_parser.load_spec_file
+            specs[full_spec] = spec_file_func(self)
+        return specs[full_spec]
+
+    def _get_par_names(self):
+        """Return the names of the parameters returned by `get_pars`"""
+        spec = self._get_pars_spec()
+        if spec is None:
+            return set()
+        return set(spec)
 
     def export_config(self, filename, include_metadata=False):
         """
@@ -1284,7 +1424,7 @@ class Step:
         directly as parameters to the current step. This is standard
         practice for `Pipeline`-based steps.
         """
-        existing = self.get_pars().keys()
+        existing = self._get_par_names()
         for parameter, value in parameters.items():
             if parameter in existing:
                 if parameter != "steps":
@@ -1405,6 +1545,10 @@ def _get_suffix(suffix, step=None, default_suffix=None):
     return suffix
 
 
+# Strings interpreted as True by `get_disable_crds_steppars`
+_TRUTHS = frozenset(("true", "True", "t", "yes", "y"))
+
+
 def get_disable_crds_steppars(default=None):
     """Return either the explicit default flag or retrieve from the environment
 
@@ -1421,18 +1565,17 @@ def get_disable_crds_steppars(default=None):
     flag: bool
         True to disable CRDS STEPPARS retrieval.
     """
-    truths = ("true", "True", "t", "yes", "y")
     if default:
         if isinstance(default, bool):
             return default
 
         if isinstance(default, str):
-            return default in truths
+            return default in _TRUTHS
 
         raise ValueError(f"default must be string or boolean: {default}")
 
     flag = os.environ.get("STPIPE_DISABLE_CRDS_STEPPARS", "")
-    return flag in truths
+    return flag in _TRUTHS
 
 
 @contextmanager
@@ -1,4 +1,5 @@
 import os
+import shlex
 import subprocess
 
 from .datamodel import AbstractDataModel
@@ -22,6 +23,7 @@ class SystemCall(Step):
     log_stderr = boolean(default=True) # Do we want to log STDERR?
     exitcode_as_exception = boolean(default=True) # Should a non-zero exit code be converted into an exception?
     failure_as_exception = boolean(default=True) # If subprocess fails to run at all, should that be an exception?
+    shell = boolean(default=True) # Run the command through the shell? If False, the command is split into arguments and run directly.
     output_ext = string(default="fits")
     """  # noqa: E501
 
@@ -35,25 +37,35 @@ class SystemCall(Step):
             else:
                 newargs.append(arg)
 
-        cmd_str = self.command.format(*newargs)
+        if self.shell:
+            cmd_args = [self.command.format(*newargs)]
+            cmd_str = cmd_args[0]
+        else:
+            # Format each argument separately so substituted values
+            # are never re-split or interpreted by a shell.
+            cmd_args = [arg.format(*newargs) for arg in shlex.split(self.command)]
+            cmd_str = shlex.join(cmd_args)
 
         env = dict(os.environ)
         for item in self.env:
             var, sep, val = item.partition("=")
             env[var] = val or None
 
-        # Start the process and wait for it to finish.
+        # Start the process and wait for it to finish. communicate
+        # drains both pipes while waiting so a child with a lot of
+        # output can't fill a pipe buffer and block forever.
         self.log.info("Spawning %r", cmd_str)
         try:
-            p = subprocess.Popen(
-                args=[cmd_str],
+            with subprocess.Popen(
+                args=cmd_args,
                 stdin=None,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE,
-                shell=True,
+                shell=self.shell,
                 env=env,
-            )
-            err = p.wait()
+            ) as p:
+                stdout, stderr = p.communicate()
+            err = p.returncode
         except Exception as e:
             self.log.info("Failed with an exception: \n%s", e)
 
@@ -64,12 +76,9 @@ class SystemCall(Step):
 
             # Log STDOUT/ERR if we are asked to do so.
             if self.log_stdout:
-                self.log.info("STDOUT: %s", p.stdout.read())
+                self.log.info("STDOUT: %s", stdout)
             if self.log_stderr:
-                self.log.info("STDERR: %s", p.stderr.read())
+                self.log.info("STDERR: %s", stderr)
 
             if self.exitcode_as_exception and err != 0:
                 raise OSError(f"{cmd_str!r} returned error code {err}")
-        finally:
-            p.stdout.close()
-            p.stderr.close()
@@ -2,6 +2,8 @@
 Utilities
 """
 
+import functools
+import importlib
 import inspect
 import os
 import sys
@@ -10,6 +12,24 @@ import types
 from . import entry_points
 
 
+@functools.cache
+def _get_class_aliases():
+    """
+    Map each registered step class alias to the fully-qualified
+    class names that use it, keyed by package name.
+
+    Entry points are only scanned once per process, clear the cache
+    with `stpipe.clear_step_alias_cache` if they change.
+    """
+    aliases = {}
+    for info in entry_points.get_steps():
+        if info.class_alias is not None:
+            aliases.setdefault(info.class_alias, {})[info.package_name] = (
+                info.class_name
+            )
+    return aliases
+
+
 def resolve_step_class_alias(name):
     """
     If the input is a recognized alias, return the
@@ -33,19 +53,20 @@ def resolve_step_class_alias(name):
     else:
         scope, class_name = None, name
 
-    # track all found steps keyed by package name
-    found_class_names = {}
-    for info in entry_points.get_steps():
-        if scope and info.package_name != scope:
-            continue
-        if info.class_alias is not None and class_name == info.class_alias:
-            found_class_names[info.package_name] = info
+    # all found steps keyed by package name
+    found_class_names = _get_class_aliases().get(class_name, {})
+    if scope:
+        found_class_names = {
+            package_name: found_class_name
+            for package_name, found_class_name in found_class_names.items()
+            if package_name == scope
+        }
 
     if not found_class_names:
         return name
 
     if len(found_class_names) == 1:
-        return found_class_names.popitem()[1].class_name
+        return next(iter(found_class_names.values()))
 
     # class alias resolved to several possible steps
     scopes = list(found_class_names.keys())
@@ -79,22 +100,15 @@ def import_class(full_name, subclassof=object, config_file=None):
     #      subclass of `subclassof`, which HAS to be a Python class.
 
     if config_file is not None:
-        sys.path.insert(0, os.path.dirname(config_file))
+        config_dir = os.path.dirname(config_file)
+        sys.path.insert(0, config_dir)
 
     try:
         full_name = full_name.strip()
         package_name, _, class_name = full_name.rpartition(".")
         if not package_name:
             raise ImportError(f"{full_name} is not a Python class")
-        imported = __import__(
-            package_name,
-            globals(),
-            locals(),
-            [
-                class_name,
-            ],
-            level=0,
-        )
+        imported = importlib.import_module(package_name)
 
         step_class = getattr(imported, class_name)
 
@@ -110,7 +124,9 @@ def import_class(full_name, subclassof=object, config_file=None):
             )
     finally:
         if config_file is not None:
-            del sys.path[0]
+            # Remove by value, sys.path[0] may have changed since
+            # the insert (for example by an import hook or thread).
+            sys.path.remove(config_dir)
 
     return step_class
 
@@ -128,15 +144,7 @@ def import_func(full_name):
     package_name, _, func_name = full_name.rpartition(".")
     if not package_name:
         raise ImportError(f"{full_name} is not a fully qualified path to function")
-    imported = __import__(
-        package_name,
-        globals(),
-        locals(),
-        [
-            func_name,
-        ],
-        level=0,
-    )
+    imported = importlib.import_module(package_name)
 
     step_func = getattr(imported, func_name)
 
@@ -58,3 +58,44 @@ def test_preserve_comments_deprecation(value):
     assert "initial comment" in spec.initial_comment[0]
     assert "final comment" in spec.final_comment[0]
     assert "inline comment (with parentheses)" in spec.inline_comments["bar"]
+
+
+def test_validate_input_file_root_dir(tmp_path):
+    """
+    Test that reused validators still resolve input files
+    relative to the root_dir of each validation.
+    """
+    (tmp_path / "a").mkdir()
+    (tmp_path / "b").mkdir()
+    (tmp_path / "a" / "in.txt").write_text("a")
+    spec = ConfigObj(["path = input_file()"], list_values=False)
+
+    config = config_parser.config_from_dict(
+        {"path": "in.txt"}, spec, root_dir=str(tmp_path / "a")
+    )
+    assert config["path"] == str(tmp_path / "a" / "in.txt")
+
+    with pytest.raises(config_parser.ValidationError, match="does not exist"):
+        config_parser.config_from_dict(
+            {"path": "in.txt"}, spec, root_dir=str(tmp_path / "b")
+        )
+
+
+def test_load_reference_config_file(tmp_path):
+    import stpipe
+
+    ref_file = tmp_path / "pars-step.cfg"
+    ref_file.write_text("value = 1\n")
+
+    stpipe.clear_crds_cache()
+    config = config_parser.load_reference_config_file(str(ref_file))
+    assert config["value"] == "1"
+    config["value"] = "modified"
+
+    # reference files don't change, so the parsed file is reused
+    ref_file.write_text("value = 2\n")
+    assert config_parser.load_reference_config_file(str(ref_file))["value"] == "1"
+
+    stpipe.clear_crds_cache()
+    assert config_parser.load_reference_config_file(str(ref_file))["value"] == "2"
+    stpipe.clear_crds_cache()
@@ -0,0 +1,117 @@
+import pytest
+
+import stpipe
+from stpipe import crds_client
+
+
+@pytest.fixture()
+def counted_lookups(monkeypatch):
+    crds_client.clear_cache()
+    calls = []
+
+    def mock_get_multiple_reference_paths(
+        parameters, reference_file_types, observatory
+    ):
+        calls.append((parameters, tuple(reference_file_types), observatory))
+        return {reftype: f"{reftype}.asdf" for reftype in reference_file_types}
+
+    monkeypatch.setattr(
+        crds_client, "get_multiple_reference_paths", mock_get_multiple_reference_paths
+    )
+    monkeypatch.setattr(crds_client, "get_context_used", lambda obs: f"{obs}_0001.pmap")
+    yield calls
+    crds_client.clear_cache()
+
+
+def test_get_cached_reference_file(counted_lookups):
+    parameters = {"meta.instrument.name": "NIRCAM"}
+    for _ in range(3):
+        assert (
+            crds_client.get_cached_reference_file(parameters, "pars-step", "jwst")
+            == "pars-step.asdf"
+        )
+    assert len(counted_lookups) == 1
+
+    crds_client.get_cached_reference_file(parameters, "pars-other", "jwst")
+    assert len(counted_lookups) == 2
+
+    crds_client.clear_cache()
+    crds_client.get_cached_reference_file(parameters, "pars-step", "jwst")
+    assert len(counted_lookups) == 3
+
+
+def test_get_cached_reference_file_unhashable(counted_lookups):
+    parameters = {"meta.exposure.list": [1, 2]}
+    for _ in range(2):
+        crds_client.get_cached_reference_file(parameters, "pars-step", "jwst")
+    assert len(counted_lookups) == 2
+
+
+def test_get_cached_reference_files(counted_lookups):
+    parameters = {"meta.instrument.name": "NIRCAM"}
+    crds_client.get_cached_reference_file(parameters, "pars-a", "jwst")
+
+    refpaths = crds_client.get_cached_reference_files(
+        parameters, ["pars-a", "pars-b", "pars-c"], "jwst"
+    )
+    assert refpaths == {
+        "pars-a": "pars-a.asdf",
+        "pars-b": "pars-b.asdf",
+        "pars-c": "pars-c.asdf",
+    }
+    # only the uncached types are requested, in a single call
+    assert counted_lookups[-1] == (parameters, ("pars-b", "pars-c"), "jwst")
+    assert len(counted_lookups) == 2
+
+    for reftype in ("pars-a", "pars-b", "pars-c"):
+        crds_client.get_cached_reference_file(parameters, reftype, "jwst")
+    assert len(counted_lookups) == 2
+
+
+def test_get_cached_reference_file_context_change(counted_lookups, monkeypatch):
+    parameters = {"meta.instrument.name": "NIRCAM"}
+    crds_client.get_cached_reference_file(parameters, "pars-step", "jwst")
+
+    monkeypatch.setattr(crds_client, "get_context_used", lambda obs: f"{obs}_0002.pmap")
+    crds_client.get_cached_reference_file(parameters, "pars-step", "jwst")
+    assert len(counted_lookups) == 2
+
+
+def test_get_cached_reference_file_unknown_context(counted_lookups, monkeypatch):
+    def fail_get_context_used(observatory):
+        raise crds_client.CrdsError("no context")
+
+    monkeypatch.setattr(crds_client, "get_context_used", fail_get_context_used)
+    parameters = {"meta.instrument.name": "NIRCAM"}
+    for _ in range(2):
+        crds_client.get_cached_reference_file(parameters, "pars-step", "jwst")
+    assert len(counted_lookups) == 2
+
+
+def test_get_cached_reference_file_missing_type(monkeypatch):
+    crds_client.clear_cache()
+    monkeypatch.setattr(crds_client, "get_multiple_reference_paths", lambda *args: {})
+    monkeypatch.setattr(crds_client, "get_context_used", lambda obs: f"{obs}_0001.pmap")
+    parameters = {"meta.instrument.name": "NIRCAM"}
+    assert (
+        crds_client.get_cached_reference_file(parameters, "pars-step", "jwst") == "N/A"
+    )
+    assert (
+        crds_client.get_cached_reference_files(parameters, ["pars-step"], "jwst") == {}
+    )
+
+
+def test_clear_crds_cache(counted_lookups):
+    parameters = {"meta.instrument.name": "NIRCAM"}
+    crds_client.get_cached_reference_files(parameters, ["dark", "flat"], "jwst")
+    stpipe.clear_crds_cache()
+    crds_client.get_cached_reference_files(parameters, ["dark", "flat"], "jwst")
+    assert len(counted_lookups) == 2
+
+
+def test_get_override_name():
+    assert crds_client.get_override_name("flat") == "override_flat"
+    assert crds_client.get_override_name("flat") == "override_flat"
+
+    with pytest.raises(ValueError, match="not a valid reference file type"):
+        crds_client.get_override_name("not-valid")
@@ -521,6 +521,19 @@ def test_asn_members_tuple(example_library):
     assert isinstance(example_library.asn["products"][0]["members"], tuple)
 
 
+def test_asn_nested_readonly(example_asn_path):
+    """
+    Test that containers nested below the products and members are also
+    read-only
+    """
+    _set_custom_member_attr(example_asn_path, 0, "extra", {"values": [1, 2]})
+    library = ModelLibrary(example_asn_path)
+    extra = library.asn["products"][0]["members"][0]["extra"]
+    assert extra["values"] == (1, 2)
+    with pytest.raises(TypeError, match="object does not support item assignment"):
+        extra["values"] = [3]
+
+
 @pytest.mark.parametrize("use_index", [True, False])
 @pytest.mark.parametrize("modify", [True, False])
 def test_on_disk_model_modification(example_asn_path, modify, use_index):
@@ -1,5 +1,6 @@
 import io
 import logging
+import sys
 
 import pytest
 
@@ -71,3 +72,93 @@ def test_record_logs():
     assert len(log_records) == 2
     assert log_records[0] == "Error from stpipe"
     assert log_records[1] == "Error from root"
+
+
+def test_pattern_trie_matches_log_config():
+    patterns = ["*", "a", "a.*", "a.b", "a.b*", "a.*.c", "*.c", "[ab].c"]
+    configs = [stpipe_log.LogConfig(pattern, handler="") for pattern in patterns]
+    trie = stpipe_log._PatternTrie()
+    for config in configs:
+        trie.insert(config)
+
+    log_names = [stpipe_log.STPIPE_ROOT_LOGGER, "other"] + [
+        f"{stpipe_log.STPIPE_ROOT_LOGGER}.{name}"
+        for name in ["", "a", "a.b", "a.bc", "a.b.c", "a.x.c", "b.c", "x"]
+    ]
+    for log_name in log_names:
+        assert trie.matches(log_name) == [c for c in configs if c.match(log_name)]
+
+
+def test_delegation_skips_disabled_levels():
+    stpipe_logger = stpipe_log.getLogger(stpipe_log.STPIPE_ROOT_LOGGER)
+    external_logger = stpipe_log.getLogger("external")
+    external_logger.setLevel(logging.DEBUG)
+    orig_level = stpipe_logger.level
+    stpipe_logger.setLevel(logging.WARNING)
+    try:
+        with stpipe_log.record_logs(
+            formatter=logging.Formatter("%(message)s")
+        ) as log_records:
+            external_logger.info("Filtered info")
+            external_logger.warning("Delegated warning")
+    finally:
+        stpipe_logger.setLevel(orig_level)
+        external_logger.setLevel(logging.NOTSET)
+
+    assert log_records == ["Delegated warning"]
+
+
+def test_record_logs_formats_at_log_time():
+    class State:
+        value = "before"
+
+        def __repr__(self):
+            return f"<State {self.value}>"
+
+    stpipe_logger = stpipe_log.getLogger(stpipe_log.STPIPE_ROOT_LOGGER)
+    state = State()
+    with stpipe_log.record_logs(
+        level=logging.ERROR, formatter=logging.Formatter("%(message)s")
+    ) as log_records:
+        stpipe_logger.error("State is %r", state)
+        # the yielded list is filled in as records are logged
+        assert log_records == ["State is <State before>"]
+        state.value = "after"
+
+    assert log_records == ["State is <State before>"]
+
+
+def test_last_matching_configuration_wins():
+    configuration = b"""
+[*]
+handler = stderr
+level = INFO
+
+[step]
+handler = stdout
+level = DEBUG
+"""
+    log = stpipe_log.getLogger(f"{stpipe_log.STPIPE_ROOT_LOGGER}.step")
+    stpipe_log.load_configuration(io.BytesIO(configuration))
+
+    assert [cfg.name for cfg in stpipe_log.log_config] == ["*", "step"]
+    assert log.level == logging.DEBUG
+    config_handlers = [h for h in log.handlers if hasattr(h, "_from_config")]
+    assert len(config_handlers) == 1
+    assert config_handlers[0].stream is sys.stdout
+
+
+def test_record_logs_lowers_logger_level():
+    stpipe_logger = stpipe_log.getLogger(stpipe_log.STPIPE_ROOT_LOGGER)
+    orig_level = stpipe_logger.level
+    stpipe_logger.setLevel(logging.INFO)
+    try:
+        with stpipe_log.record_logs(
+            level=logging.DEBUG, formatter=logging.Formatter("%(message)s")
+        ) as log_records:
+            stpipe_logger.debug("Debug from stpipe")
+        assert stpipe_logger.level == logging.INFO
+    finally:
+        stpipe_logger.setLevel(orig_level)
+
+    assert log_records == ["Debug from stpipe"]
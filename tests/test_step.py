@@ -1,14 +1,19 @@
 """Test step.Step"""
 
+import gc
+import inspect
+import io
 import logging
 import re
+from os.path import join
 from typing import ClassVar
 
 import asdf
 import pytest
 
 import stpipe.config_parser as cp
-from stpipe import cmdline
+from stpipe import cmdline, crds_client
+from stpipe import log as stpipe_log
 from stpipe.pipeline import Pipeline
 from stpipe.step import Step
 
@@ -411,3 +416,363 @@ def test_log_records():
     pipeline.run()
 
     assert any(r == "This step has called out a warning." for r in pipeline.log_records)
+
+
+class RefStepA(Step):
+    spec = """
+        output_ext = string(default='fits')
+    """
+    reference_file_types: ClassVar = ["flat", "dark"]
+
+
+class RefStepB(Step):
+    spec = """
+        output_ext = string(default='fits')
+    """
+    reference_file_types: ClassVar = ["gain"]
+
+
+class RefPipe(Pipeline):
+    spec = """
+        output_ext = string(default='fits')
+    """
+    step_defs: ClassVar = {"step_a": RefStepA, "step_b": RefStepB}
+
+
+def test_pipeline_reference_file_types_follow_skip():
+    pipe = RefPipe()
+    assert pipe.reference_file_types == ["flat", "dark", "gain"]
+    assert pipe._unskipped_steps == [pipe.step_a, pipe.step_b]
+
+    pipe.step_a.skip = True
+    assert pipe.reference_file_types == ["gain"]
+
+    pipe.step_a.skip = False
+    pipe.step_b.prefetch_references = False
+    assert pipe.reference_file_types == ["flat", "dark"]
+    assert pipe._unskipped_steps == [pipe.step_a]
+
+
+class NestedRefPipe(Pipeline):
+    spec = """
+        output_ext = string(default='fits')
+    """
+    step_defs: ClassVar = {"inner": RefPipe}
+
+
+def test_nested_pipeline_reference_file_types_follow_skip():
+    outer = NestedRefPipe()
+    assert outer.reference_file_types == ["flat", "dark", "gain"]
+
+    outer.inner.step_a.skip = True
+    assert outer.inner.reference_file_types == ["gain"]
+    assert outer.reference_file_types == ["gain"]
+
+
+class SharedRefPipe(Pipeline):
+    spec = """
+        output_ext = string(default='fits')
+    """
+    step_defs: ClassVar = {"step_a": RefStepA, "step_b": RefStepB, "step_c": RefStepA}
+
+
+def test_pipeline_reference_file_types_unique():
+    pipe = SharedRefPipe()
+    assert pipe.reference_file_types == ["flat", "dark", "gain"]
+
+
+class RepeatedStepPipe(Pipeline):
+    spec = """
+        output_ext = string(default='fits')
+    """
+    step_defs: ClassVar = {"first": RefStepA, "second": RefStepA}
+
+
+def test_pipeline_spec_repeated_step_class(monkeypatch):
+    calls = []
+    load_spec_file = RefStepA.load_spec_file.__func__
+
+    def counting_load_spec_file(cls, preserve_comments=cp._not_set):
+        calls.append(cls)
+        return load_spec_file(cls, preserve_comments=preserve_comments)
+
+    monkeypatch.setattr(
+        RefStepA, "load_spec_file", classmethod(counting_load_spec_file)
+    )
+    spec = RepeatedStepPipe.load_spec_file()
+
+    assert calls == [RefStepA]
+    assert "override_flat" in spec["steps"]["first"]
+    assert "override_flat" in spec["steps"]["second"]
+
+
+def test_disabled_config_from_reference_skips_open(monkeypatch):
+    def fail_open(*args, **kwargs):
+        raise AssertionError("dataset should not be opened")
+
+    monkeypatch.setattr(SimpleStep, "_datamodels_open", fail_open)
+    assert SimpleStep.get_config_from_reference("foo.fits", disable=True) == {}
+
+
+def test_config_from_reference_follows_crds_context(monkeypatch):
+    calls = []
+
+    def get_multiple_reference_paths(parameters, reference_file_types, observatory):
+        calls.append(tuple(reference_file_types))
+        return {reftype: "N/A" for reftype in reference_file_types}
+
+    monkeypatch.setattr(
+        crds_client, "get_multiple_reference_paths", get_multiple_reference_paths
+    )
+    monkeypatch.setattr(crds_client, "get_context_used", lambda obs: "jwst_0001.pmap")
+    crds_client.clear_cache()
+
+    parameters = {"meta.instrument.name": "NIRCAM"}
+    for _ in range(2):
+        SimpleStep.get_config_from_reference(
+            parameters, disable=False, crds_observatory="jwst"
+        )
+    assert calls == [("pars-simplestep",)]
+
+    # parameters chosen under another context are not reused
+    monkeypatch.setattr(crds_client, "get_context_used", lambda obs: "jwst_0002.pmap")
+    SimpleStep.get_config_from_reference(
+        parameters, disable=False, crds_observatory="jwst"
+    )
+    assert len(calls) == 2
+    crds_client.clear_cache()
+
+
+def test_load_spec_file_cached(monkeypatch):
+    class CachedSpecStep(Step):
+        spec = """
+            output_ext = string(default='fits')
+        """
+        reference_file_types: ClassVar = ["flat"]
+
+    spec = CachedSpecStep.load_spec_file()
+    assert "override_flat" in spec
+
+    # further calls don't re-load the spec
+    def fail_load(*args, **kwargs):
+        raise AssertionError("spec should be cached")
+
+    monkeypatch.setattr(cp, "get_merged_spec_file", fail_load)
+    spec["output_ext"] = "string(default='asdf')"
+    assert CachedSpecStep.load_spec_file()["output_ext"] == "string(default='fits')"
+
+
+def test_get_pars_spec_cached(monkeypatch):
+    class CachedParsStep(Step):
+        spec = """
+            str1 = string(default='default')
+            output_ext = string(default='fits')
+        """
+
+    step = CachedParsStep(str1="first")
+    assert step.get_pars()["str1"] == "first"
+    assert step.get_pars(full_spec=False)["str1"] == "first"
+
+    def fail_load(*args, **kwargs):
+        raise AssertionError("spec should be cached")
+
+    monkeypatch.setattr(cp, "get_merged_spec_file", fail_load)
+    monkeypatch.setattr(cp, "load_spec_file", fail_load)
+    step.str1 = "second"
+    assert step.get_pars()["str1"] == "second"
+    other = CachedParsStep(str1="third")
+    assert other.get_pars(full_spec=False)["str1"] == "third"
+
+
+def test_load_spec_file_follows_step_defs():
+    class InnerPipe(Pipeline):
+        spec = """
+            output_ext = string(default='fits')
+        """
+        step_defs: ClassVar = {"step_a": RefStepA}
+
+    class OuterPipe(Pipeline):
+        spec = """
+            output_ext = string(default='fits')
+        """
+        step_defs: ClassVar = {"inner": InnerPipe}
+
+    assert "step_a" in OuterPipe.load_spec_file()["steps"]["inner"]["steps"]
+
+    InnerPipe.step_defs = {"step_b": RefStepB}
+    assert list(InnerPipe.load_spec_file()["steps"]) == ["step_b"]
+    assert list(OuterPipe.load_spec_file()["steps"]["inner"]["steps"]) == ["step_b"]
+
+    OuterPipe.step_defs["other"] = RefStepA
+    assert "other" in OuterPipe.load_spec_file()["steps"]
+
+
+def test_discouraged_types_lazy():
+    from astropy.io import fits
+
+    import stpipe.step
+
+    assert stpipe.step.DISCOURAGED_TYPES == (fits.HDUList,)
+
+
+def test_get_config_reftype():
+    assert SimpleStep.get_config_reftype() == "pars-simplestep"
+    assert SimplePipe.get_config_reftype() == "pars-simplepipe"
+    assert Step.get_config_reftype() == "pars-step"
+
+
+class EchoStep(Step):
+    spec = """
+        output_ext = string(default='fits')
+    """
+
+    def process(self, value):
+        return value
+
+
+class EchoPipe(Pipeline):
+    spec = """
+        output_ext = string(default='fits')
+    """
+    step_defs: ClassVar = {"echo1": EchoStep, "echo2": EchoStep}
+
+    def process(self, value):
+        return self.echo2.run(self.echo1.run(value))
+
+
+def test_gc_collect_only_top_level(monkeypatch):
+    collections = []
+    monkeypatch.setattr(gc, "collect", lambda *args: collections.append(args))
+
+    assert EchoPipe().run(1) == 1
+    assert len(collections) == 1
+
+
+def test_parameters_not_built_if_not_logged(monkeypatch):
+    def fail_get_pars(*args, **kwargs):
+        raise AssertionError("parameters should not be built")
+
+    step = EchoStep()
+    step.log.setLevel(logging.WARNING)
+    monkeypatch.setattr(step, "get_pars", fail_get_pars)
+    assert step.run(1) == 1
+
+
+def test_incorrect_number_of_arguments():
+    with pytest.raises(TypeError, match="Incorrect number of arguments to step"):
+        EchoStep().run(1, 2)
+
+
+def test_process_signature_cached(monkeypatch):
+    class SignatureStep(EchoStep):
+        pass
+
+    SignatureStep().run(1)
+
+    def fail_signature(*args, **kwargs):
+        raise AssertionError("signature should be cached")
+
+    monkeypatch.setattr(inspect, "signature", fail_signature)
+    SignatureStep().run(1)
+    with pytest.raises(TypeError, match="Incorrect number of arguments to step"):
+        SignatureStep().run(1, 2)
+
+
+def test_process_type_error_is_not_replaced():
+    class TypeErrorStep(EchoStep):
+        def process(self, value):
+            raise TypeError("bad value")
+
+    with pytest.raises(TypeError, match="bad value"):
+        TypeErrorStep().run(1)
+
+
+def test_step_log_level_after_configuration_reload():
+    step = EchoStep(name="ReloadedLogStep")
+    assert step.log.level == logging.DEBUG
+
+    # loading a configuration sets the level of existing stpipe loggers
+    stpipe_log.load_configuration(io.BytesIO(stpipe_log.DEFAULT_CONFIGURATION))
+    assert step.log.level == logging.INFO
+
+    # a new step reusing the logger lowers it again, so record_logs
+    # can capture the step's debug messages
+    step = EchoStep(name="ReloadedLogStep")
+    assert step.log.level == logging.DEBUG
+    with stpipe_log.record_logs(
+        level=logging.DEBUG, formatter=logging.Formatter("%(message)s")
+    ) as log_records:
+        step.log.debug("Step debug message")
+    assert "Step debug message" in log_records
+
+
+def test_search_attr():
+    pipe = EchoPipe()
+    step = pipe.echo1
+    pipe.output_dir = "pipe_dir"
+    assert step.search_attr("output_dir") == "pipe_dir"
+
+    step.output_dir = "step_dir"
+    assert step.search_attr("output_dir") == "step_dir"
+    assert step.search_attr("output_dir", parent_first=True) == "pipe_dir"
+
+    assert step.search_attr("missing_attr", default="default") == "default"
+    assert step.search_attr("missing_attr", "default", parent_first=True) == "default"
+
+
+def test_unknown_output_path_warns_once(caplog):
+    class Saveable:
+        def save(self, path, overwrite=False):
+            raise AssertionError("should not be saved")
+
+    calls = []
+
+    def make_output_path(step, **kwargs):
+        calls.append(kwargs)
+        raise AttributeError("no output path")
+
+    step = EchoStep(save_results=True)
+    step._make_output_path = make_output_path
+    step.run([Saveable(), Saveable()])
+
+    assert len(calls) == 1
+    assert caplog.text.count("cannot determine filename") == 1
+
+
+def test_make_output_path_output_dir(monkeypatch):
+    step = EchoStep()
+    assert step.make_output_path(basepath="data.fits") == "data_echostep.fits"
+
+    monkeypatch.setenv("ECHO_OUTPUT_DIR", "first")
+    step.output_dir = "$ECHO_OUTPUT_DIR"
+    assert step.make_output_path(basepath="data.fits") == join(
+        "first", "data_echostep.fits"
+    )
+
+    # environment changes are honored on the next save
+    monkeypatch.setenv("ECHO_OUTPUT_DIR", "second")
+    assert step.make_output_path(basepath="data.fits") == join(
+        "second", "data_echostep.fits"
+    )
+
+
+def test_update_pars():
+    pipe = EchoPipe()
+    pipe.update_pars(
+        {
+            "output_ext": "asdf",
+            "not_a_parameter": 1,
+            "steps": {"echo2": {"skip": True, "also_not_a_parameter": 2}},
+        }
+    )
+    assert pipe.output_ext == "asdf"
+    assert not hasattr(pipe, "not_a_parameter")
+    assert pipe.echo2.skip
+    assert not pipe.echo1.skip
+    assert not hasattr(pipe.echo2, "also_not_a_parameter")
+
+    # round trip
+    pars = pipe.get_pars()
+    other = EchoPipe()
+    other.update_pars(pars)
+    assert other.get_pars() == pars
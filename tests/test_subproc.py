@@ -0,0 +1,30 @@
+import sys
+
+import pytest
+
+from stpipe.subproc import SystemCall
+
+
+def test_large_output(caplog):
+    # more output than fits in a pipe buffer
+    command = f'"{sys.executable}" -c "print(\'x\' * 200000)"'
+    SystemCall(command=command).run()
+
+    assert "Done with errorcode 0" in caplog.text
+    assert "x" * 200000 in caplog.text
+
+
+def test_exitcode_as_exception():
+    command = f'"{sys.executable}" -c "raise SystemExit(3)"'
+    with pytest.raises(OSError, match="returned error code 3"):
+        SystemCall(command=command).run()
+
+
+def test_no_shell(caplog, tmp_path):
+    # a substituted value with spaces and shell characters is passed as
+    # a single argument
+    value = str(tmp_path / "a b;c")
+    command = f'"{sys.executable}" -c "import sys; print(repr(sys.argv[1]))" {{0}}'
+    SystemCall(command=command, shell=False).run(value)
+
+    assert repr(value) in caplog.text
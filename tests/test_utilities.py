@@ -1,6 +1,8 @@
+import sys
+
 import pytest
 
-from stpipe import Step
+from stpipe import Step, clear_step_alias_cache
 from stpipe.utilities import import_class, import_func, resolve_step_class_alias
 
 
@@ -26,6 +28,22 @@ def test_import_class():
     assert step_class is Step
 
 
+def test_import_class_config_file(tmp_path, monkeypatch):
+    (tmp_path / "config_dir_step.py").write_text(
+        "from stpipe import Step\n\n\nclass ConfigDirStep(Step):\n    pass\n"
+    )
+    monkeypatch.delitem(sys.modules, "config_dir_step", raising=False)
+    orig_path = list(sys.path)
+
+    step_class = import_class(
+        "config_dir_step.ConfigDirStep",
+        subclassof=Step,
+        config_file=str(tmp_path / "config.asdf"),
+    )
+    assert step_class.__name__ == "ConfigDirStep"
+    assert sys.path == orig_path
+
+
 def test_import_class_on_func():
     with pytest.raises(TypeError):
         import_class("test_utilities.what_is_your_quest", subclassof=Step)
@@ -82,7 +100,9 @@ def mock_entry_points(monkeypatch, request):
     import importlib_metadata
 
     monkeypatch.setattr(importlib_metadata, "entry_points", fake_entrypoints)
+    clear_step_alias_cache()
     yield
+    clear_step_alias_cache()
 
 
 @pytest.mark.parametrize("name", ("foo_step", "stpipe::foo_step"))
@@ -152,3 +172,29 @@ def test_class_alias_lookup_conflict(mock_entry_points):
         resolve_step_class_alias("foo_step")
     assert err.match("aaa::foo_step")
     assert err.match("zzz::foo_step")
+
+
+@pytest.mark.parametrize(
+    "mock_entry_points", [{"stpipe": [("Foo", "foo_step", False)]}], indirect=True
+)
+def test_class_alias_lookup_cached(mock_entry_points, monkeypatch):
+    """
+    Test that entry points are only scanned once for repeated lookups.
+    """
+    from stpipe import entry_points
+
+    calls = []
+    get_steps = entry_points.get_steps
+
+    def counted_get_steps():
+        calls.append(None)
+        return get_steps()
+
+    monkeypatch.setattr(entry_points, "get_steps", counted_get_steps)
+    for name in ("foo_step", "stpipe::foo_step", "bar_step"):
+        resolve_step_class_alias(name)
+    assert len(calls) == 1
+
+    clear_step_alias_cache()
+    resolve_step_class_alias("foo_step")
+    assert len(calls) == 2